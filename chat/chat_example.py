@@ -16,11 +16,24 @@ Usage:
 """
 
 import sys
+import shutil
 import requests
 from typing import Optional, Callable
 import io
 import locale
+import atexit
 import json
+import os
+import sqlite3
+import tempfile
+import hashlib
+import threading
+import time
+import unicodedata
+import uuid
+import zlib
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
 
 # Set locale to UTF-8
 try:
@@ -43,6 +56,202 @@ if hasattr(sys.stderr, 'buffer'):
 CODEER_API_KEY = "your_workspace_api_key"
 CODEER_API_ROOT = "http://localhost:8000"
 CODEER_DEFAULT_AGENT = None  # Optional: Set agent UUID or None for default agent
+CODEER_JSON_BACKEND = None  # Optional: "orjson", "msgspec", "json" or None to pick the fastest installed (read once at import)
+CODEER_SEARCH_INDEX_PATH = os.path.expanduser("~/.codeer_chat_index.sqlite3")  # Local /search index
+CODEER_ANSWER_CACHE = False  # Optional: replay repeated first questions of new chats from a local cache (needs an agent; a replayed turn is not in the server history, see README)
+CODEER_ANSWER_CACHE_PATH = None  # Optional: file to persist the answer cache across runs
+CODEER_COMPRESSION = True  # Negotiate zstd/br/gzip response compression (False: identity only)
+
+# ============================================
+# JSON Codec
+# ============================================
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _lenient_loads(fast_loads):
+    """Wrap a bytes decoder so invalid UTF-8 is replaced instead of failing the parse"""
+
+    def loads(data):
+        try:
+            return fast_loads(data)
+        except Exception:
+            if not isinstance(data, (bytes, bytearray)):
+                raise
+            return fast_loads(data.decode("utf-8", errors="replace"))
+
+    return loads
+
+
+def _select_json_backend(name: Optional[str] = None):
+    """
+    Pick (name, dumps, loads) for the requested backend.
+    dumps returns UTF-8 bytes; loads accepts bytes or str.
+    Falls back to the stdlib json module when nothing faster is installed.
+    """
+    if name in (None, "orjson") and orjson is not None:
+        return "orjson", orjson.dumps, _lenient_loads(orjson.loads)
+    if name in (None, "msgspec") and msgspec is not None:
+        return "msgspec", msgspec.json.encode, _lenient_loads(msgspec.json.decode)
+    if name not in (None, "json"):
+        print(f"JSON backend '{name}' is not installed, using stdlib json", file=sys.stderr)
+
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    decoder = json.JSONDecoder()
+
+    def loads(data):
+        # json.loads sniffs the encoding of bytes input; decoding up front is cheaper.
+        # Invalid bytes are replaced, as when SSE lines were decoded as text.
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode("utf-8", errors="replace")
+        return decoder.decode(data)
+
+    return "json", dumps, loads
+
+
+JSON_BACKEND, json_dumps, json_loads = _select_json_backend(CODEER_JSON_BACKEND)
+
+# ============================================
+# HTTP Transport
+# ============================================
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def accept_encoding() -> str:
+    """Accept-Encoding value for the codecs this client can decode, best first"""
+    if not CODEER_COMPRESSION:
+        return "identity"
+    codecs = []
+    if zstandard is not None:
+        codecs.append("zstd")
+    if brotli is not None:
+        codecs.append("br")
+    codecs.append("gzip")
+    return ", ".join(codecs)
+
+
+def _make_decompressor(encoding: str):
+    """
+    Incremental decompressor for a Content-Encoding, as a
+    (decompress(chunk) -> bytes, finished() -> bool) pair; finished()
+    tells whether the compressed stream was complete. Identity passes
+    bytes through.
+    """
+    if encoding in ("", "identity"):
+        return (lambda chunk: chunk), (lambda: True)
+    if encoding in ("gzip", "x-gzip", "deflate"):
+        wbits = zlib.MAX_WBITS if encoding == "deflate" else 16 + zlib.MAX_WBITS
+        decompressor = zlib.decompressobj(wbits)
+        return decompressor.decompress, (lambda: decompressor.eof)
+    if encoding == "br" and brotli is not None:
+        decompressor = brotli.Decompressor()
+        # brotli exposes process(), brotlicffi decompress()
+        is_finished = getattr(decompressor, "is_finished", None)
+        return (
+            getattr(decompressor, "process", None) or decompressor.decompress,
+            is_finished or (lambda: True),
+        )
+    if encoding == "zstd" and zstandard is not None:
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        return decompressor.decompress, (lambda: getattr(decompressor, "eof", True))
+    raise Exception(f"Unsupported Content-Encoding: {encoding}")
+
+
+class TransferStats:
+    """
+    Per-call payload accounting: body bytes on the wire (after content
+    encoding) against decoded bytes. Keeps the last max_calls calls and
+    running totals per API function.
+    """
+
+    def __init__(self, max_calls: int = 1000):
+        self.calls = deque(maxlen=max_calls)
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, encoding: str, wire_bytes: int, decoded_bytes: int, elapsed: float):
+        with self._lock:
+            self.calls.append({
+                "call": name,
+                "encoding": encoding or "identity",
+                "wire_bytes": wire_bytes,
+                "decoded_bytes": decoded_bytes,
+                "elapsed_ms": round(elapsed * 1000, 3),
+            })
+            totals = self.totals.setdefault(name, {"calls": 0, "wire_bytes": 0, "decoded_bytes": 0})
+            totals["calls"] += 1
+            totals["wire_bytes"] += wire_bytes
+            totals["decoded_bytes"] += decoded_bytes
+
+
+TRANSFER_STATS = TransferStats()
+
+
+def iter_body(response, name: str, chunk_size: int = 65536):
+    """
+    Yield the decoded response body incrementally and record its size
+    in TRANSFER_STATS. Requires a request made with stream=True; the
+    body is read undecoded and decompressed here so wire bytes can be
+    counted. Chunked responses (SSE) are read one HTTP chunk at a time.
+    """
+    started = time.perf_counter()
+    encoding = (response.headers.get("Content-Encoding") or "").strip().lower()
+    wire_bytes = 0
+    decoded_bytes = 0
+    try:
+        decompress, finished = _make_decompressor(encoding)
+        raw = response.raw
+        for chunk in raw.stream(None if raw.chunked else chunk_size, decode_content=False):
+            wire_bytes += len(chunk)
+            data = decompress(chunk)
+            if data:
+                decoded_bytes += len(data)
+                yield data
+        if wire_bytes and not finished():
+            raise Exception(f"Truncated {encoding} response body")
+    finally:
+        response.close()
+        TRANSFER_STATS.record(name, encoding, wire_bytes, decoded_bytes, time.perf_counter() - started)
+
+
+def read_body(response, name: str) -> bytes:
+    """Read and decode a whole (non-streaming) response body"""
+    return b"".join(iter_body(response, name))
+
+
+def iter_body_lines(chunks):
+    """Split decoded body chunks into lines (bytes, without LF/CRLF)"""
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line[:-1] if line.endswith(b"\r") else line
+    if pending:
+        yield pending[:-1] if pending.endswith(b"\r") else pending
 
 # ============================================
 # API Functions
@@ -69,12 +278,15 @@ def create_chat(name: str = "Untitled", agent_id: Optional[str] = None) -> dict:
             headers={
                 "Content-Type": "application/json",
                 "x-api-key": CODEER_API_KEY,
+                "Accept-Encoding": accept_encoding(),
             },
-            json=body,
+            data=json_dumps(body),
+            stream=True,
         )
 
+        content = read_body(response, "create_chat")
         try:
-            resp = response.json()
+            resp = json_loads(content)
         except Exception:
             resp = None
 
@@ -105,11 +317,14 @@ def list_published_agents():
             api_url,
             headers={
                 "x-api-key": CODEER_API_KEY,
+                "Accept-Encoding": accept_encoding(),
             },
+            stream=True,
         )
 
+        content = read_body(response, "list_published_agents")
         try:
-            resp = response.json()
+            resp = json_loads(content)
         except Exception:
             resp = None
 
@@ -157,12 +372,15 @@ def list_chats(
             api_url,
             headers={
                 "x-api-key": CODEER_API_KEY,
+                "Accept-Encoding": accept_encoding(),
             },
             params=params,
+            stream=True,
         )
 
+        content = read_body(response, "list_chats")
         try:
-            resp = response.json()
+            resp = json_loads(content)
         except Exception:
             resp = None
 
@@ -198,12 +416,15 @@ def list_chat_messages(chat_id: int, limit: int = 1000, offset: int = 0):
             api_url,
             headers={
                 "x-api-key": CODEER_API_KEY,
+                "Accept-Encoding": accept_encoding(),
             },
             params=params,
+            stream=True,
         )
 
+        content = read_body(response, "list_chat_messages")
         try:
-            resp = response.json()
+            resp = json_loads(content)
         except Exception:
             resp = None
 
@@ -227,7 +448,9 @@ def send_question(
     payload: dict,
     on_message: Optional[Callable[[str], None]] = None,
     on_done: Optional[Callable[[], None]] = None,
-    on_error: Optional[Callable[[Exception], None]] = None
+    on_error: Optional[Callable[[Exception], None]] = None,
+    cache: Optional["AnswerCache"] = None,
+    on_event: Optional[Callable[[dict], None]] = None,
 ):
     """
     Send a message and receive streaming response via Server-Sent Events (SSE)
@@ -238,46 +461,82 @@ def send_question(
         on_message: Called for each chunk of the response
         on_done: Called when streaming completes
         on_error: Called if an error occurs
+        cache: Optional AnswerCache; the first question of a chat is looked
+            up and a hit replays the stored answer as a synthetic SSE stream
+            instead of calling the API
+        on_event: Called with every parsed JSON event (reasoning steps, usage, ...)
     """
     try:
-        api_url = f"{CODEER_API_ROOT}/api/v1/chats/{chat_id}/messages"
-        
-        response = requests.post(
-            api_url,
-            headers={
-                "Content-Type": "application/json; charset=utf-8",
-                "x-api-key": CODEER_API_KEY,
-            },
-            json=payload,
-        )
-        response.encoding = "utf-8"
+        cache_key = None
+        if cache is not None:
+            # Later turns depend on the conversation so far: only the first
+            # question of a chat is looked up, and a follow-up to a cached
+            # answer first sends that question so the server has the history
+            cache.send_pending_turn(chat_id)
+            cache_key = cache.make_key(payload)
+            if cache_key and not cache.is_first_turn(chat_id):
+                cache_key = None
+            cache.mark_chat(chat_id, False)
+        cached = cache.get(cache_key) if cache_key else None
+
+        if cached is not None:
+            cache.add_pending_turn(chat_id, payload)
+            lines = cache.replay(chat_id, payload, cached)
+        else:
+            api_url = f"{CODEER_API_ROOT}/api/v1/chats/{chat_id}/messages"
+
+            response = requests.post(
+                api_url,
+                headers={
+                    "Content-Type": "application/json; charset=utf-8",
+                    "x-api-key": CODEER_API_KEY,
+                    "Accept-Encoding": accept_encoding(),
+                },
+                data=json_dumps(payload),
+                stream=True,
+            )
 
-        error_data = None
-        if not response.ok:
-            try:
-                error_data = response.json()
-            except Exception:
-                error_data = None
-            message = None
-            if isinstance(error_data, dict):
-                message = error_data.get("message") or error_data.get("error")
-            if not message:
-                message = f"HTTP {response.status_code}"
-            raise Exception(f"API error: {message}")
+            error_data = None
+            if not response.ok:
+                try:
+                    error_data = json_loads(read_body(response, "send_question"))
+                except Exception:
+                    error_data = None
+                message = None
+                if isinstance(error_data, dict):
+                    message = error_data.get("message") or error_data.get("error")
+                if not message:
+                    message = f"HTTP {response.status_code}"
+                raise Exception(f"API error: {message}")
+
+            # 512-byte reads keep latency low if the stream is not chunked
+            lines = iter_body_lines(iter_body(response, "send_question", chunk_size=512))
         
         # Parse SSE stream
         event_name = None
         data_lines = []
         done_called = False
         has_output_text = False
+        stream_failed = False
+        completed = False
+        recorded_deltas = []
+        recorded_final_text = None
+
+        def remember_answer():
+            # Only complete answers are stored, never a truncated stream
+            if cached is None and cache_key and completed and not stream_failed:
+                if recorded_deltas or recorded_final_text is not None:
+                    cache.put(cache_key, {"deltas": recorded_deltas, "final_text": recorded_final_text})
 
         def dispatch_event():
             nonlocal event_name, data_lines, done_called, has_output_text
+            nonlocal stream_failed, completed, recorded_final_text
             
             if not data_lines and not event_name:
                 return False
             
-            raw_payload = "\n".join(data_lines).strip()
+            # Payload stays as bytes so the JSON codec can decode it directly
+            raw_payload = b"\n".join(data_lines).strip()
             ev = (event_name or "").lower()
 
             if not raw_payload:
@@ -285,28 +544,36 @@ def send_question(
                 data_lines = []
                 return False
 
-            if raw_payload == "[DONE]":
+            if raw_payload == b"[DONE]":
+                completed = True
                 if on_done and not done_called:
                     on_done()
                     done_called = True
                 return True
 
             parsed = None
-            if raw_payload.startswith("{"):
+            if raw_payload.startswith(b"{"):
                 try:
-                    parsed = json.loads(raw_payload)
+                    parsed = json_loads(raw_payload)
                 except Exception as e:
                     print(
-                        f"Failed to parse SSE JSON: {e} | {raw_payload}",
+                        f"Failed to parse SSE JSON: {e} | {raw_payload.decode('utf-8', errors='replace')}",
                         file=sys.stderr,
                     )
 
+            if on_event and isinstance(parsed, dict):
+                try:
+                    on_event(parsed)
+                except Exception as e:
+                    print(f"Error processing event: {e}", file=sys.stderr)
+
             if ev == "error" or (isinstance(parsed, dict) and parsed.get("type") == "error"):
+                stream_failed = True
                 message = None
                 if isinstance(parsed, dict):
                     message = parsed.get("message") or parsed.get("error")
                 if not message:
-                    message = raw_payload or "Stream error"
+                    message = raw_payload.decode("utf-8", errors="replace") or "Stream error"
                 if on_error:
                     on_error(Exception(message))
                 if on_done and not done_called:
@@ -314,6 +581,14 @@ def send_question(
                     done_called = True
                 return True
 
+            if cache_key and isinstance(parsed, dict):
+                if parsed.get("type") == "response.output_text.delta" and isinstance(parsed.get("delta"), str):
+                    recorded_deltas.append(parsed["delta"])
+                elif parsed.get("type") == "response.output_text.completed":
+                    completed = True
+                    if isinstance(parsed.get("final_text"), str):
+                        recorded_final_text = parsed["final_text"]
+
             if on_message:
                 text_chunk: Optional[str] = None
 
@@ -334,7 +609,7 @@ def send_question(
                     text_chunk = parsed["final_text"]
                 elif parsed is None:
                     # Legacy plain-text streaming fallback
-                    text_chunk = raw_payload
+                    text_chunk = raw_payload.decode("utf-8", errors="replace")
 
                 if text_chunk:
                     try:
@@ -347,39 +622,39 @@ def send_question(
             return False
         
         # Process streaming response line by line
-        for line in response.iter_lines(decode_unicode=True):
+        # (kept as raw bytes; only event names and text chunks are decoded)
+        for line in lines:
             if line is None:
                 continue
-            
-            # Ensure proper UTF-8 decoding
-            if isinstance(line, bytes):
-                line = line.decode('utf-8', errors='replace')
-                
+
             # Empty line triggers event dispatch
-            if line == "":
+            if line == b"":
                 if data_lines or event_name:
                     should_stop = dispatch_event()
                     if should_stop:
+                        remember_answer()
                         return
                 continue
             
             # Skip comments
-            if line.startswith(":"):
+            if line.startswith(b":"):
                 continue
             
             # Parse event name
-            if line.startswith("event:"):
-                event_name = line[6:].strip()
+            if line.startswith(b"event:"):
+                event_name = line[6:].strip().decode("utf-8", errors="replace")
                 continue
             
             # Parse data
-            if line.startswith("data:"):
+            if line.startswith(b"data:"):
                 data_content = line[5:].lstrip()
                 
-                if data_content.strip() == "[DONE]":
+                if data_content.strip() == b"[DONE]":
+                    completed = True
                     if on_done and not done_called:
                         on_done()
                         done_called = True
+                    remember_answer()
                     return
                 
                 data_lines.append(data_content)
@@ -392,6 +667,8 @@ def send_question(
         # Final dispatch if there's remaining data
         if data_lines or event_name:
             dispatch_event()
+
+        remember_answer()
         
         if on_done and not done_called:
             on_done()
@@ -403,17 +680,573 @@ def send_question(
         raise
 
 
+# ============================================
+# Answer Cache
+# ============================================
+
+class AnswerCache:
+    """
+    Opt-in cache of streamed answers for repeated questions.
+
+    Only the first question of a chat is cached, since later answers depend
+    on the conversation. Entries are keyed by agent id, the agent's published
+    version, the normalized message text and the attached file UUIDs, and are
+    evicted LRU-first or once they are older than ttl_seconds. A hit is
+    replayed through send_question() as a synthetic SSE stream, so callbacks
+    see the same events as for a live answer.
+
+    Limitations: a hit is not sent to the API, so until the chat continues
+    the server-side history (list_chat_messages(), /open, /search) does not
+    have that turn. A follow-up first sends the cached question, which the
+    server answers again; the stored answer can differ from the replayed one.
+    Questions waiting to be sent are kept in memory only. Requests without
+    an agent id (no CODEER_DEFAULT_AGENT or agent_id) are never cached.
+
+    With a path, entries are written at most every save_seconds and at exit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600,
+        path: Optional[str] = None,
+        agent_refresh_seconds: float = 60,
+        save_seconds: float = 30,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.agent_refresh_seconds = agent_refresh_seconds
+        self.save_seconds = save_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, entry)
+        self._pending_turns = OrderedDict()  # chat_id -> payload answered from the cache
+        self._first_turns = OrderedDict()  # chat_id -> whether nothing was sent to it yet
+        self._agent_versions = {}
+        self._agents_loaded_at = None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if path:
+            self._load()
+            atexit.register(self.save)
+
+    def agent_version(self, agent_id: str):
+        """Published version of an agent, re-fetched every agent_refresh_seconds"""
+        now = time.monotonic()
+        if self._agents_loaded_at is None or now - self._agents_loaded_at > self.agent_refresh_seconds:
+            try:
+                agents = list_published_agents()
+            except Exception:
+                return None
+            self._agent_versions = {str(agent.get("id")): agent.get("version") for agent in agents}
+            self._agents_loaded_at = now
+        return self._agent_versions.get(str(agent_id))
+
+    def make_key(self, payload: dict) -> Optional[str]:
+        """
+        Cache key for a send_question() payload, or None if the
+        request cannot be cached (not streaming, or unknown agent).
+        """
+        if not payload.get("stream", True):
+            return None
+
+        agent_id = payload.get("agent_id") or CODEER_DEFAULT_AGENT
+        if not agent_id:
+            return None
+
+        version = self.agent_version(agent_id)
+        if version is None:
+            return None
+
+        message = " ".join(str(payload.get("message") or "").split()).casefold()
+        attachments = sorted(str(file_uuid) for file_uuid in payload.get("attached_file_uuids") or [])
+        return hashlib.sha256(json_dumps([str(agent_id), version, message, attachments])).hexdigest()
+
+    def mark_chat(self, chat_id: int, first_turn: bool):
+        """Record whether chat_id has no messages yet (e.g. just created, or a question was sent)"""
+        with self._lock:
+            self._first_turns[chat_id] = first_turn
+            self._first_turns.move_to_end(chat_id)
+            while len(self._first_turns) > self.max_entries:
+                self._first_turns.popitem(last=False)
+
+    def is_first_turn(self, chat_id: int) -> bool:
+        """
+        Whether chat_id has no messages yet, i.e. its answer can be cached.
+        Only chats this cache has not seen are looked up on the server.
+        """
+        with self._lock:
+            if chat_id in self._pending_turns:
+                return False
+            first_turn = self._first_turns.get(chat_id)
+        if first_turn is None:
+            try:
+                first_turn = not list_chat_messages(chat_id, limit=1, offset=0)
+            except Exception:
+                return False
+            self.mark_chat(chat_id, first_turn)
+        return first_turn
+
+    def add_pending_turn(self, chat_id: int, payload: dict):
+        """Remember a question answered from the cache and not sent to the API"""
+        with self._lock:
+            self._pending_turns[chat_id] = payload
+            while len(self._pending_turns) > self.max_entries:
+                self._pending_turns.popitem(last=False)
+
+    def send_pending_turn(self, chat_id: int):
+        """Send the cached question of chat_id, if any, so a follow-up has its context"""
+        with self._lock:
+            payload = self._pending_turns.pop(chat_id, None)
+        if payload is None:
+            return
+
+        api_url = f"{CODEER_API_ROOT}/api/v1/chats/{chat_id}/messages"
+        response = requests.post(
+            api_url,
+            headers={
+                "Content-Type": "application/json; charset=utf-8",
+                "x-api-key": CODEER_API_KEY,
+                "Accept-Encoding": accept_encoding(),
+            },
+            data=json_dumps(payload),
+            stream=True,
+        )
+        # The answer was already shown from the cache; drain it
+        read_body(response, "send_question")
+        if not response.ok:
+            raise Exception(f"API error: HTTP {response.status_code} sending cached question")
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            due = self.path and time.monotonic() - self._saved_at >= self.save_seconds
+        if due:
+            self.save()
+
+    def replay(self, chat_id: int, payload: dict, entry: dict):
+        """Yield SSE lines (bytes) equivalent to a live stream of the cached answer"""
+        base = {"response_id": str(uuid.uuid4()), "chat_id": chat_id}
+        final_text = entry.get("final_text")
+        if final_text is None:
+            final_text = "".join(entry.get("deltas") or [])
+
+        events = [("response.created", {"type": "response.created", **base, "agent_id": payload.get("agent_id")})]
+        for delta in entry.get("deltas") or []:
+            events.append(("response.output_text.delta", {"type": "response.output_text.delta", **base, "delta": delta}))
+        events.append(("response.output_text.completed", {"type": "response.output_text.completed", **base, "final_text": final_text}))
+
+        for name, data in events:
+            yield b"event: " + name.encode("utf-8")
+            yield b"data: " + json_dumps(data)
+            yield b""
+        yield b"data: [DONE]"
+        yield b""
+
+    def save(self):
+        """Write the entries to path if they changed since the last save"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # Written in LRU order so a reload keeps the eviction order
+                items = [[key, expires_at, entry] for key, (expires_at, entry) in self._entries.items()]
+                self._dirty = False
+                self._saved_at = time.monotonic()
+
+            tmp_path = None
+            try:
+                with tempfile.NamedTemporaryFile(
+                    dir=os.path.dirname(os.path.abspath(self.path)),
+                    prefix=os.path.basename(self.path) + ".",
+                    suffix=".tmp",
+                    delete=False,
+                ) as f:
+                    tmp_path = f.name
+                    f.write(json_dumps(items))
+                os.replace(tmp_path, self.path)
+            except Exception as err:
+                print(f"Failed to persist answer cache {self.path}: {err}", file=sys.stderr)
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                items = json_loads(f.read())
+
+            if not isinstance(items, list):
+                raise ValueError("expected a list of entries")
+            loaded = []
+            for item in items:
+                key, expires_at, entry = item
+                if not isinstance(key, str) or not isinstance(expires_at, (int, float)) or not isinstance(entry, dict):
+                    raise ValueError("unexpected entry format")
+                loaded.append((key, expires_at, entry))
+        except FileNotFoundError:
+            return
+        except Exception as err:
+            print(f"Ignoring unreadable answer cache {self.path}: {err}", file=sys.stderr)
+            return
+
+        now = time.time()
+        for key, expires_at, entry in loaded:
+            if expires_at > now:
+                self._entries[key] = (expires_at, entry)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# ============================================
+# Local Search Index
+# ============================================
+
+class ChatSearchIndex:
+    """
+    Local SQLite FTS5 full-text index over chat histories.
+
+    Built from list_chats() + list_chat_messages(). Messages are returned
+    oldest → newest, so each chat only needs the messages past the count
+    already indexed; chats whose updated_at did not change are skipped.
+    updated_at only has second resolution, so chats updated around the
+    previous sweep (within CLOCK_SKEW_SECONDS) are re-checked anyway.
+    Chats missing from list_chats() are dropped, and a chat whose last
+    indexed message moved (messages deleted) is re-indexed from scratch.
+    message_chats maps FTS rowids to chats so those deletes are index
+    lookups rather than scans of the FTS table.
+    """
+
+    PAGE_SIZE = 1000
+    CLOCK_SKEW_SECONDS = 60
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or CODEER_SEARCH_INDEX_PATH
+        self.conn = sqlite3.connect(self.path)
+        tables = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chats (
+                id INTEGER PRIMARY KEY,
+                name TEXT,
+                agent_id TEXT,
+                updated_at TEXT,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                last_message_id INTEGER
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5(
+                content,
+                chat_id UNINDEXED,
+                role UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            CREATE TABLE IF NOT EXISTS message_chats (
+                rowid INTEGER PRIMARY KEY,
+                chat_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS message_chats_chat_id ON message_chats (chat_id);
+            CREATE TABLE IF NOT EXISTS index_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            """
+        )
+        # Index files created before deletions were tracked
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(chats)")}
+        if "last_message_id" not in columns:
+            self.conn.execute("ALTER TABLE chats ADD COLUMN last_message_id INTEGER")
+        if "messages" in tables and "message_chats" not in tables:
+            with self.conn:
+                self.conn.execute("INSERT INTO message_chats (rowid, chat_id) SELECT rowid, chat_id FROM messages")
+
+    def close(self):
+        self.conn.close()
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM chats LIMIT 1").fetchone() is None
+
+    def refresh(self) -> tuple:
+        """
+        Bring the index up to date with the server.
+        Returns (chats_updated, messages_added, chats_removed).
+        """
+        chats_updated = 0
+        messages_added = 0
+        seen_ids = set()
+        offset = 0
+
+        sweep_started = time.time()
+        row = self.conn.execute("SELECT value FROM index_state WHERE key = 'sweep_started'").fetchone()
+        recheck_after = float(row[0]) - self.CLOCK_SKEW_SECONDS if row else None
+
+        while True:
+            chats = list_chats(limit=self.PAGE_SIZE, offset=offset)
+            for chat in chats:
+                if chat.get("id") is not None:
+                    seen_ids.add(chat["id"])
+                added = self._refresh_chat(chat, recheck_after)
+                if added is not None:
+                    chats_updated += 1
+                    messages_added += added
+            if len(chats) < self.PAGE_SIZE:
+                break
+            offset += self.PAGE_SIZE
+
+        # Only reached after a complete sweep, so a failed list_chats never drops chats
+        stale_ids = [row[0] for row in self.conn.execute("SELECT id FROM chats") if row[0] not in seen_ids]
+        with self.conn:
+            for chat_id in stale_ids:
+                self._drop_chat(chat_id)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO index_state (key, value) VALUES ('sweep_started', ?)", (str(sweep_started),)
+            )
+
+        return chats_updated, messages_added, len(stale_ids)
+
+    def _drop_chat(self, chat_id: int):
+        self._delete_messages(chat_id)
+        self.conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+
+    def _delete_messages(self, chat_id: int):
+        # chat_id is UNINDEXED in the FTS table; delete its rows by rowid instead
+        rowids = self.conn.execute("SELECT rowid FROM message_chats WHERE chat_id = ?", (chat_id,)).fetchall()
+        self.conn.executemany("DELETE FROM messages WHERE rowid = ?", rowids)
+        self.conn.execute("DELETE FROM message_chats WHERE chat_id = ?", (chat_id,))
+
+    @staticmethod
+    def _updated_since(updated_at: str, since: Optional[float]) -> bool:
+        """Whether an API updated_at timestamp may be at or after since (epoch seconds)"""
+        if since is None:
+            return True
+        try:
+            updated = datetime.fromisoformat(updated_at.replace("Z", "+00:00"))
+        except ValueError:
+            return True
+        if updated.tzinfo is None:
+            updated = updated.replace(tzinfo=timezone.utc)
+        return updated.timestamp() >= since
+
+    def _refresh_chat(self, chat: dict, recheck_after: Optional[float] = None) -> Optional[int]:
+        """Index new messages of one chat; returns None if it was already up to date."""
+        chat_id = chat.get("id")
+        if chat_id is None:
+            return None
+
+        updated_at = chat.get("updated_at") or ""
+        row = self.conn.execute(
+            "SELECT updated_at, message_count, last_message_id FROM chats WHERE id = ?", (chat_id,)
+        ).fetchone()
+        unchanged = row is not None and row[0] == updated_at
+        if unchanged and not self._updated_since(updated_at, recheck_after):
+            return None
+
+        message_count = row[1] if row else 0
+        last_message_id = row[2] if row else None
+
+        # Re-read the last indexed message: if it is no longer at the same
+        # offset, earlier messages were deleted and the chat is rebuilt
+        offset = message_count - 1 if message_count else 0
+        added = 0
+        with self.conn:
+            first_page = True
+            while True:
+                messages = list_chat_messages(chat_id, limit=self.PAGE_SIZE, offset=offset)
+                if first_page and message_count:
+                    first_page = False
+                    if not messages or messages[0].get("id") != last_message_id:
+                        self._delete_messages(chat_id)
+                        message_count = 0
+                        last_message_id = None
+                        offset = 0
+                        continue
+                    offset += 1
+                    messages = messages[1:]
+                    fetched = len(messages) + 1
+                else:
+                    first_page = False
+                    fetched = len(messages)
+
+                rows = [
+                    (message.get("id"), message.get("content") or "", chat_id, message.get("role") or "")
+                    for message in messages
+                    if message.get("id") is not None
+                ]
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO messages (rowid, content, chat_id, role) VALUES (?, ?, ?, ?)", rows
+                )
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO message_chats (rowid, chat_id) VALUES (?, ?)",
+                    [(row[0], chat_id) for row in rows],
+                )
+                if messages:
+                    last_message_id = messages[-1].get("id")
+                message_count += len(messages)
+                offset += len(messages)
+                added += len(messages)
+                if fetched < self.PAGE_SIZE:
+                    break
+
+            meta = chat.get("meta") or {}
+            self.conn.execute(
+                "INSERT OR REPLACE INTO chats (id, name, agent_id, updated_at, message_count, last_message_id)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (chat_id, chat.get("name") or "", meta.get("conversation_agent_id"), updated_at, message_count, last_message_id),
+            )
+        if unchanged and not added and message_count == row[1]:
+            return None
+        return added
+
+    def search(self, terms: str, limit: int = 10) -> list:
+        """
+        Rank chats by their best matching message (BM25).
+        Returns chat dicts shaped like list_chats() items, each with a "hits"
+        list holding {"role", "snippet"} of its best matching message.
+        """
+        # Quote every term so user input is never parsed as FTS5 query syntax
+        query = " ".join('"' + term.replace('"', '""') + '"' for term in terms.split())
+        if not query:
+            return []
+
+        # rank is FTS5's built-in bm25() score; bm25() itself cannot be used in an
+        # aggregate. With MIN(), SQLite returns rowid/role from the best row per chat.
+        ranked = self.conn.execute(
+            "SELECT chat_id, MIN(rank) AS best, rowid, role FROM messages WHERE messages MATCH ?"
+            " GROUP BY chat_id ORDER BY best LIMIT ?",
+            (query, limit),
+        ).fetchall()
+        if not ranked:
+            return []
+
+        chat_ids = [row[0] for row in ranked]
+        placeholders = ",".join("?" * len(chat_ids))
+        chat_rows = {
+            row[0]: row
+            for row in self.conn.execute(
+                f"SELECT id, name, agent_id, updated_at FROM chats WHERE id IN ({placeholders})",
+                chat_ids,
+            )
+        }
+
+        # snippet() only for the best rows; in the ranking query it would run for every match
+        rowids = [row[2] for row in ranked]
+        snippets = dict(
+            self.conn.execute(
+                "SELECT rowid, snippet(messages, 0, '[', ']', '…', 12) FROM messages"
+                f" WHERE messages MATCH ? AND rowid IN ({placeholders})",
+                (query, *rowids),
+            )
+        )
+
+        results = []
+        for chat_id, _, rowid, role in ranked:
+            _, name, agent_id, updated_at = chat_rows.get(chat_id, (chat_id, None, None, None))
+            results.append({
+                "id": chat_id,
+                "name": name,
+                "updated_at": updated_at,
+                "meta": {"conversation_agent_id": agent_id},
+                "hits": [{"role": role, "snippet": snippets.get(rowid, "")}],
+            })
+        return results
+
+
 # ============================================
 # Interactive CLI
 # ============================================
 
+def _char_cells(char: str) -> int:
+    """Terminal cells taken by a character: 2 for wide/fullwidth (CJK), 0 for combining marks"""
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+def _wrap_end(text: str, pos: int, width: int) -> int:
+    """Offset where a line starting at pos and at most width cells wide ends"""
+    end = pos
+    cells = 0
+    length = len(text)
+    while end < length and text[end] != "\n":
+        cells += _char_cells(text[end])
+        if cells > width:
+            break
+        end += 1
+    if end == pos and end < length and text[end] != "\n":
+        # A single character wider than the line still has to go somewhere
+        end += 1
+    return end
+
+
+def iter_wrapped_lines(text: str, width: int, first_width: Optional[int] = None):
+    """
+    Yield (line, end_offset) for text wrapped to width terminal cells, one
+    line at a time; the first line can be narrower (first_width) to leave
+    room for a label. Only looks at the next width characters per step, so
+    huge messages are never split or copied as a whole.
+    """
+    width = max(width, 20)
+    line_width = width if first_width is None else max(first_width, 10)
+    pos = 0
+    length = len(text)
+    while pos < length:
+        window = text[pos:pos + line_width + 1]
+        if window.isascii():
+            newline = window.find("\n")
+            end = pos + line_width if newline == -1 else pos + newline
+        else:
+            end = _wrap_end(text, pos, line_width)
+
+        if end < length and text[end] == "\n":
+            yield text[pos:end].rstrip("\r"), end + 1
+            pos = end + 1
+        else:
+            if end < length:
+                # Prefer breaking at a space in the second half of the line
+                space = text.rfind(" ", pos + (end - pos) // 2, end)
+                if space != -1:
+                    end = space + 1
+            else:
+                end = length
+            yield text[pos:end].rstrip(), end
+            pos = end
+        line_width = width
+
+
 class ChatCLI:
+    ROLE_LABELS = {
+        "system": "System",
+        "user": "You",
+        "assistant": "Assistant",
+    }
+    HISTORY_PAGE_SIZE = 50  # Messages fetched per request when rendering history
+    HISTORY_PREVIEW_LINES = 20  # Longer messages are truncated; /expand shows them in full
+
     def __init__(self):
         self.chat_id = None
         self.agent_id = CODEER_DEFAULT_AGENT
         self.is_typing = False
         self.agents = []
         self.chats = []
+        self.search_index = None
+        self.answer_cache = AnswerCache(path=CODEER_ANSWER_CACHE_PATH) if CODEER_ANSWER_CACHE else None
     
     def print_welcome(self):
         """Print welcome message and instructions"""
@@ -425,7 +1258,11 @@ class ChatCLI:
         print("  /agents          - List published agents")
         print("  /agent <id|#>    - Change active agent (before /new)")
         print("  /chats           - List recent chat histories")
-        print("  /open <id|#>     - Load and show a chat history")
+        print("  /open <id|#>     - Load and show a chat history (--details: files, reasoning)")
+        print("  /expand <#>      - Show message # of the open chat in full")
+        print("  /search <terms>  - Full-text search over chat histories")
+        print("  /reindex         - Update the local search index")
+        print("  /stats           - Show payload sizes (wire vs decoded) per API call")
         print("  /quit            - Exit the application")
         current_agent = self.agent_id or "Workspace default"
         print(f"\nCurrent agent: {current_agent}")
@@ -558,7 +1395,85 @@ class ChatCLI:
         except Exception as err:
             print(f"\n❌ Failed to list chats: {err}\n")
 
-    def open_chat(self, chat_spec: str):
+    def show_transfer_stats(self):
+        """Print wire vs decoded body bytes per API function"""
+        totals = TRANSFER_STATS.totals
+        if not totals:
+            print("\n📦 No API calls recorded yet.\n")
+            return
+
+        print(f"\n📦 Payload sizes (Accept-Encoding: {accept_encoding()}):")
+        for name, total in sorted(totals.items()):
+            wire = total["wire_bytes"]
+            decoded = total["decoded_bytes"]
+            ratio = f"{decoded / wire:.1f}x" if wire else "-"
+            print(f"  {name}: {total['calls']} calls, {wire:,} bytes on wire, {decoded:,} decoded ({ratio})")
+        print("")
+
+    def get_search_index(self) -> ChatSearchIndex:
+        """Open the local search index (without refreshing it)"""
+        if self.search_index is None:
+            self.search_index = ChatSearchIndex()
+        return self.search_index
+
+    def refresh_search_index(self):
+        """Fetch chats and messages changed since the last refresh"""
+        try:
+            chats_updated, messages_added, chats_removed = self.get_search_index().refresh()
+            print(
+                f"\n🔎 Search index updated: {messages_added} new messages"
+                f" in {chats_updated} chats, {chats_removed} chats removed.\n"
+            )
+        except Exception as err:
+            print(f"\n❌ Failed to update search index: {err}\n")
+
+    def search_chats(self, terms: str):
+        """
+        Search the local index and print matching chats, best first.
+        Results replace the /chats list so /open <#> works on them.
+        """
+        if not terms:
+            print(
+                "\nUsage: /search <terms>\n"
+                "  - Use /reindex to pick up new messages.\n"
+            )
+            return
+
+        try:
+            search_index = self.get_search_index()
+        except Exception as err:
+            print(f"\n❌ Search failed: {err}\n")
+            return
+
+        if search_index.is_empty():
+            print("\n🔎 Building local search index (first run)...")
+            self.refresh_search_index()
+
+        try:
+            results = search_index.search(terms)
+        except Exception as err:
+            print(f"\n❌ Search failed: {err}\n")
+            return
+
+        if not results:
+            print(f"\n🔎 No chats match: {terms}\n")
+            return
+
+        self.chats = results
+
+        print(f"\n🔎 Chats matching: {terms}")
+        for index, chat in enumerate(results, start=1):
+            name = chat.get("name") or "Untitled"
+            print(f"  {index}. ID: {chat.get('id')}")
+            print(f"     Name: {name}")
+            for hit in chat["hits"][:3]:
+                role = (hit.get("role") or "").lower()
+                label = self.ROLE_LABELS.get(role, role.capitalize() or "Message")
+                snippet = " ".join((hit.get("snippet") or "").split())
+                print(f"     {label}: {snippet}")
+        print("\nUse /open <#> to load a chat.\n")
+
+    def open_chat(self, chat_spec: str, details: bool = False):
         """
         Load an existing chat by index from /chats
         or by chat ID, then print its history and
@@ -617,46 +1532,98 @@ class ChatCLI:
         chat_name = selected_chat.get("name") or "Untitled"
         print(f"\n📜 Loaded chat {self.chat_id}: {chat_name}\n")
 
+        # Render page by page so only one page of messages is held at a time
+        number = 0
+        offset = 0
+        while True:
+            try:
+                messages = list_chat_messages(self.chat_id, limit=self.HISTORY_PAGE_SIZE, offset=offset)
+            except Exception as err:
+                print(f"❌ Failed to load chat messages: {err}\n")
+                return
+
+            if offset == 0:
+                if not messages:
+                    print("ℹ️  This chat has no messages yet.\n")
+                    return
+                print("—— Chat History ———————————————")
+
+            for message in messages:
+                number += 1
+                self.print_message(message, number, self.HISTORY_PREVIEW_LINES, details)
+
+            if len(messages) < self.HISTORY_PAGE_SIZE:
+                break
+            offset += len(messages)
+
+        print("—— End of History ———————————\n")
+        print("You can now continue chatting in this thread.\n")
+
+    def expand_message(self, number_spec: str):
+        """Print one message of the open chat in full, by its number in /open"""
+        if self.chat_id is None or not number_spec.isdigit() or int(number_spec) < 1:
+            print("\nUsage: /expand <#>\n  - Open a chat with /open first.\n")
+            return
+
         try:
-            messages = list_chat_messages(self.chat_id, limit=1000, offset=0)
+            messages = list_chat_messages(self.chat_id, limit=1, offset=int(number_spec) - 1)
         except Exception as err:
-            print(f"❌ Failed to load chat messages: {err}\n")
+            print(f"\n❌ Failed to load message: {err}\n")
             return
 
         if not messages:
-            print("ℹ️  This chat has no messages yet.\n")
+            print(f"\n❌ No message #{number_spec} in this chat.\n")
             return
 
-        role_labels = {
-            "system": "System",
-            "user": "You",
-            "assistant": "Assistant",
-        }
+        print("")
+        self.print_message(messages[0], int(number_spec), max_lines=None, details=True)
 
-        print("—— Chat History ———————————————")
-        for message in messages:
-            role = (message.get("role") or "").lower()
-            content = message.get("content") or ""
-            label = role_labels.get(role, role.capitalize() or "Message")
+    def print_message(self, message: dict, number: int, max_lines: Optional[int], details: bool):
+        """
+        Print a history message wrapped to the terminal width, truncated
+        after max_lines. Attachments and reasoning steps only with details.
+        """
+        role = (message.get("role") or "").lower()
+        content = message.get("content") or ""
+        label = self.ROLE_LABELS.get(role, role.capitalize() or "Message")
+        width = shutil.get_terminal_size().columns - 4
+
+        shown = 0
+        consumed = 0
+        for line, end in iter_wrapped_lines(content, width, first_width=width - len(label) - 2):
+            if max_lines is not None and shown >= max_lines:
+                remaining = len(content) - consumed
+                print(f"    … {remaining:,} more characters (/expand {number} to show all)")
+                break
+            print(f"{label}: {line}" if shown == 0 else f"    {line}")
+            shown += 1
+            consumed = end
 
-            lines = content.splitlines() or [""]
-            if not lines:
-                print(f"{label}:")
-                continue
+        if shown == 0:
+            print(f"{label}: ")
 
-            print(f"{label}: {lines[0]}")
-            for line in lines[1:]:
-                print(f"    {line}")
-            print("")
+        if details:
+            for attached in message.get("attached_files") or []:
+                name = attached.get("name") or attached.get("id") or "file"
+                print(f"    📎 {name} ({attached.get('type') or attached.get('attachment_type') or 'file'})")
 
-        print("—— End of History ———————————\n")
-        print("You can now continue chatting in this thread.\n")
+            meta = message.get("meta") or {}
+            for step in meta.get("reasoning_steps") or []:
+                if not isinstance(step, dict):
+                    continue
+                prefix = f"    🧠 {step.get('type') or 'step'}: "
+                summary = " ".join(str(step.get("content") or "").split())
+                summary = next(iter_wrapped_lines(summary, width, first_width=width - len(prefix) - 1), ("", 0))[0]
+                print(f"{prefix}{summary}")
+        print("")
     
     def create_new_chat(self, name: str = "Untitled"):
         """Create a new chat session"""
         try:
             chat_data = create_chat(name[:256], self.agent_id)
             self.chat_id = chat_data["id"]
+            if self.answer_cache is not None:
+                self.answer_cache.mark_chat(self.chat_id, True)
             print(f"🆕 Chat created with ID: {self.chat_id}\n")
         except Exception as e:
             print(f"❌ Failed to create chat: {e}\n")
@@ -700,7 +1667,8 @@ class ChatCLI:
                 },
                 on_message=on_message,
                 on_done=on_done,
-                on_error=on_error
+                on_error=on_error,
+                cache=self.answer_cache,
             )
         except Exception as e:
             print(f"\n❌ Streaming error: {e}\n")
@@ -743,12 +1711,35 @@ class ChatCLI:
                         self.change_agent(parts[1].strip())
                     continue
 
+                if user_input == "/stats":
+                    self.show_transfer_stats()
+                    continue
+
+                if user_input == "/reindex":
+                    self.refresh_search_index()
+                    continue
+
+                if user_input.startswith("/search"):
+                    parts = user_input.split(maxsplit=1)
+                    if len(parts) == 1:
+                        self.search_chats("")
+                    else:
+                        self.search_chats(parts[1].strip())
+                    continue
+
                 if user_input.startswith("/open"):
+                    args = user_input.split()[1:]
+                    details = "--details" in args
+                    specs = [arg for arg in args if arg != "--details"]
+                    self.open_chat(specs[0] if specs else "", details=details)
+                    continue
+
+                if user_input.startswith("/expand"):
                     parts = user_input.split(maxsplit=1)
                     if len(parts) == 1:
-                        self.open_chat("")
+                        self.expand_message("")
                     else:
-                        self.open_chat(parts[1].strip())
+                        self.expand_message(parts[1].strip())
                     continue
                 
                 # Send message
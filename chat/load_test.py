@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Codeer Chat API Load Generator (Python)
+
+Headless capacity test built on the client functions in chat_example.py.
+Each virtual user repeatedly runs:
+1. create_chat()
+2. send_question() (streaming)
+3. list_chat_messages()
+
+Virtual users run as threads spread over several processes. Latencies are
+recorded in HDR-style histograms and streamed to a JSON Lines file once per
+interval (per-interval and cumulative percentiles for TTFB, first delta,
+total answer time, create_chat and list_chat_messages).
+
+Usage:
+- Offline against the bundled stub: python load_test.py --stub --users 20 --duration 30
+- Against a deployment: python load_test.py --api-root http://localhost:8000 --api-key KEY \\
+      --agent AGENT_UUID --ramp 30:50,120:50,15:0 --processes 4 --output latency.jsonl
+- Ramp profile: comma-separated <seconds>:<users> stages; users change linearly
+  from the previous stage's target (starting at 0) over each stage
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+import chat_example
+
+
+# ============================================
+# Latency Histogram
+# ============================================
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of latencies in microseconds.
+
+    Values are bucketed with 11 bits of sub-bucket precision, so a bucket
+    spans at most 1/1024 of its values; percentiles report the bucket
+    midpoint, within about 0.05% of the recorded value. Memory stays bounded
+    whatever the sample count and histograms from several workers can be
+    merged exactly.
+    """
+
+    SUB_BUCKET_BITS = 11
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.max = 0
+
+    def record(self, value_us: int):
+        value = max(int(value_us), 0)
+        shift = max(value.bit_length() - self.SUB_BUCKET_BITS, 0)
+        bucket = (value >> shift) << shift
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentiles(self, quantiles=(50, 90, 99, 99.9)) -> dict:
+        """Summary in milliseconds: {"count", "p50", ..., "max"}"""
+        summary = {"count": self.count}
+        if not self.count:
+            return summary
+
+        buckets = sorted(self.counts.items())
+        for q in quantiles:
+            rank = max(int(self.count * q / 100.0 + 0.5), 1)
+            seen = 0
+            for bucket, count in buckets:
+                seen += count
+                if seen >= rank:
+                    shift = max(bucket.bit_length() - self.SUB_BUCKET_BITS, 0)
+                    value = min(bucket + ((1 << shift) >> 1), self.max)
+                    summary[f"p{q:g}"] = round(value / 1000.0, 3)
+                    break
+        summary["max"] = round(self.max / 1000.0, 3)
+        return summary
+
+
+METRICS = ("create_chat", "ttfb", "first_delta", "total", "list_messages")
+
+
+# ============================================
+# Ramp Profile
+# ============================================
+
+def parse_ramp(spec: str) -> list:
+    """Parse "30:50,120:50,15:0" into [(30.0, 50), (120.0, 50), (15.0, 0)]"""
+    stages = []
+    for part in spec.split(","):
+        seconds, _, users = part.strip().partition(":")
+        if not users:
+            raise ValueError(f"Invalid ramp stage '{part}', expected <seconds>:<users>")
+        stages.append((float(seconds), int(users)))
+    return stages
+
+
+def target_users(stages: list, elapsed: float) -> float:
+    """Number of virtual users that should be active `elapsed` seconds in"""
+    previous = 0
+    for seconds, users in stages:
+        if elapsed < seconds:
+            return previous + (users - previous) * (elapsed / seconds)
+        elapsed -= seconds
+        previous = users
+    return previous
+
+
+# ============================================
+# Worker Processes
+# ============================================
+
+def run_iteration(user_index: int, message: str, agent_id) -> dict:
+    """One create_chat → send_question → list_chat_messages flow, timed"""
+    sample = {"ok": False}
+    started = time.perf_counter()
+    chat = chat_example.create_chat(f"Load test user {user_index}", agent_id)
+    sample["create_chat"] = time.perf_counter() - started
+
+    errors = []
+    marks = {}
+    sent = time.perf_counter()
+
+    def on_event(event):
+        marks.setdefault("ttfb", time.perf_counter() - sent)
+
+    def on_message(chunk):
+        marks.setdefault("first_delta", time.perf_counter() - sent)
+
+    chat_example.send_question(
+        chat["id"],
+        {"message": message, "stream": True, "agent_id": agent_id},
+        on_message=on_message,
+        on_error=errors.append,
+        on_event=on_event,
+    )
+    sample["total"] = time.perf_counter() - sent
+    sample.update(marks)
+    if errors:
+        sample["error"] = str(errors[0])
+        return sample
+
+    started = time.perf_counter()
+    chat_example.list_chat_messages(chat["id"], limit=50, offset=0)
+    sample["list_messages"] = time.perf_counter() - started
+    sample["ok"] = True
+    return sample
+
+
+def virtual_user(user_index: int, config: dict, start_time: float, stop, results):
+    """Run iterations while this user's index is below the ramp target"""
+    stages = config["stages"]
+    while not stop.is_set():
+        elapsed = time.time() - start_time
+        if elapsed >= config["duration"]:
+            return
+        if user_index >= target_users(stages, elapsed):
+            time.sleep(0.1)
+            continue
+
+        try:
+            sample = run_iteration(user_index, config["message"], config["agent_id"])
+        except Exception as err:
+            sample = {"ok": False, "error": str(err)}
+        results.put(sample)
+
+        if config["think_time"]:
+            time.sleep(config["think_time"])
+
+
+def worker_main(user_indexes: list, config: dict, start_time: float, stop, results):
+    """Process entry point: one thread per virtual user"""
+    chat_example.CODEER_API_ROOT = config["api_root"]
+    chat_example.CODEER_API_KEY = config["api_key"]
+    # The client functions print progress for interactive use; keep workers quiet
+    sys.stdout = open(os.devnull, "w")
+
+    threads = [
+        threading.Thread(target=virtual_user, args=(index, config, start_time, stop, results), daemon=True)
+        for index in user_indexes
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+# ============================================
+# Reporting
+# ============================================
+
+class LatencyReport:
+    """Aggregates worker samples and writes one JSON line per interval"""
+
+    def __init__(self, output_path: str, stages: list, start_time: float):
+        self.output = open(output_path, "w", encoding="utf-8")
+        self.stages = stages
+        self.start_time = start_time
+        self.cumulative = {metric: LatencyHistogram() for metric in METRICS}
+        self.totals = {"iterations": 0, "errors": 0}
+        self.reset_interval()
+
+    def reset_interval(self):
+        self.interval = {metric: LatencyHistogram() for metric in METRICS}
+        self.interval_totals = {"iterations": 0, "errors": 0}
+        self.last_error = None
+
+    def add(self, sample: dict):
+        self.interval_totals["iterations"] += 1
+        if not sample.get("ok"):
+            self.interval_totals["errors"] += 1
+            self.last_error = sample.get("error")
+        for metric in METRICS:
+            if metric in sample:
+                self.interval[metric].record(sample[metric] * 1_000_000)
+
+    def flush(self):
+        elapsed = time.time() - self.start_time
+        for metric in METRICS:
+            self.cumulative[metric].merge(self.interval[metric])
+        for key, value in self.interval_totals.items():
+            self.totals[key] += value
+
+        record = {
+            "elapsed_s": round(elapsed, 3),
+            "target_users": int(target_users(self.stages, elapsed)),
+            "interval": {"iterations": self.interval_totals["iterations"], "errors": self.interval_totals["errors"]},
+            "cumulative": dict(self.totals),
+        }
+        for metric in METRICS:
+            record["interval"][metric] = self.interval[metric].percentiles()
+            record["cumulative"][metric] = self.cumulative[metric].percentiles()
+        if self.last_error:
+            record["interval"]["last_error"] = self.last_error
+        self.output.write(json.dumps(record) + "\n")
+        self.output.flush()
+
+        ttfb = record["interval"]["ttfb"]
+        total = record["interval"]["total"]
+        print(
+            f"[{elapsed:7.1f}s] users={record['target_users']:<4}"
+            f" iterations={self.interval_totals['iterations']:<5}"
+            f" errors={self.interval_totals['errors']:<4}"
+            f" ttfb p50/p99={ttfb.get('p50', '-')}/{ttfb.get('p99', '-')} ms"
+            f" total p50/p99={total.get('p50', '-')}/{total.get('p99', '-')} ms"
+        )
+        self.reset_interval()
+
+    def close(self):
+        self.output.close()
+
+
+# ============================================
+# Main Entry Point
+# ============================================
+
+def main():
+    """Parse arguments, start worker processes and stream the latency report"""
+    parser = argparse.ArgumentParser(description="Headless load generator for the Codeer Chat API")
+    parser.add_argument("--api-root", default=chat_example.CODEER_API_ROOT)
+    parser.add_argument("--api-key", default=chat_example.CODEER_API_KEY)
+    parser.add_argument("--agent", default=chat_example.CODEER_DEFAULT_AGENT, help="agent UUID")
+    parser.add_argument("--users", type=int, default=10, help="virtual users (ignored with --ramp)")
+    parser.add_argument("--duration", type=float, default=60, help="seconds (ignored with --ramp)")
+    parser.add_argument("--ramp", help="ramp profile, e.g. 30:50,120:50,15:0")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between iterations per user")
+    parser.add_argument("--message", default="Hello! This is a load test message.")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between report lines")
+    parser.add_argument("--output", default="load_test_latency.jsonl", help="JSON Lines latency report")
+    parser.add_argument("--stub", action="store_true", help="run against an in-process stub server")
+    args = parser.parse_args()
+
+    if args.ramp:
+        stages = parse_ramp(args.ramp)
+    else:
+        # Constant load: start every user immediately
+        stages = [(0, args.users), (args.duration, args.users)]
+    duration = sum(seconds for seconds, _ in stages)
+    max_users = max(users for _, users in stages)
+
+    api_root = args.api_root
+    agent_id = args.agent
+    if args.stub:
+        import stub_server
+        server = stub_server.start_stub_server()
+        api_root = f"http://127.0.0.1:{server.server_address[1]}"
+        agent_id = agent_id or stub_server.STUB_AGENT["id"]
+
+    config = {
+        "api_root": api_root,
+        "api_key": args.api_key,
+        "agent_id": agent_id,
+        "message": args.message,
+        "think_time": args.think_time,
+        "stages": stages,
+        "duration": duration,
+    }
+
+    processes = max(min(args.processes, max_users), 1)
+    print(
+        f"Load test against {api_root}: up to {max_users} users"
+        f" on {processes} processes for {duration:.0f}s → {args.output}"
+    )
+
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    start_time = time.time()
+    workers = [
+        multiprocessing.Process(
+            target=worker_main,
+            args=(list(range(index, max_users, processes)), config, start_time, stop, results),
+            daemon=True,
+        )
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    report = LatencyReport(args.output, stages, start_time)
+    next_flush = start_time + args.interval
+    try:
+        while any(worker.is_alive() for worker in workers) or not results.empty():
+            try:
+                report.add(results.get(timeout=max(next_flush - time.time(), 0.01)))
+            except queue.Empty:
+                pass
+            if time.time() >= next_flush:
+                report.flush()
+                next_flush += args.interval
+    except KeyboardInterrupt:
+        print("\nStopping virtual users...")
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=5)
+    if report.interval_totals["iterations"]:
+        report.flush()
+    report.close()
+
+    print("\nCumulative latency (ms):")
+    for metric in METRICS:
+        summary = report.cumulative[metric].percentiles()
+        print(f"  {metric:<14} {json.dumps(summary)}")
+    print(f"  iterations={report.totals['iterations']} errors={report.totals['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Codeer Chat API Stub Server (Python)
+
+A small in-memory stand-in for the Codeer Chat API, for trying the
+examples and running load tests offline. It implements:
+1. GET  /api/v1/chats/published-agents
+2. POST /api/v1/chats and GET /api/v1/chats
+3. GET  /api/v1/chats/{chat_id}/messages
+4. POST /api/v1/chats/{chat_id}/messages (SSE stream or JSON answer)
+
+Answers are canned text streamed word by word with a configurable delay.
+Responses are compressed according to Accept-Encoding (gzip, plus br/zstd
+when brotli/zstandard are installed); SSE streams are flushed per event.
+The API key is not checked.
+
+Usage:
+- Run: python stub_server.py --port 8000
+- Point CODEER_API_ROOT at http://localhost:8000
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STUB_AGENT = {
+    "id": "00000000-0000-4000-8000-000000000001",
+    "name": "Stub Agent",
+    "description": "Canned answers for offline testing",
+    "agent_type": "assistant",
+    "llm_model": "stub",
+    "use_search": False,
+    "version": 1,
+}
+
+STUB_ANSWER_WORDS = (
+    "This is a canned answer from the Codeer stub server. "
+    "It streams one word at a time so clients can measure time to first "
+    "byte, time to first delta and total response time without a real model."
+).split()
+
+MESSAGES_PATH = re.compile(r"^/api/v1/chats/(\d+)/messages$")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class StreamCompressor:
+    """Compressor whose every compress() output can be decoded on its own arrival"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=5)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor().compressobj()
+        else:
+            self._obj = None
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "gzip":
+            return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        if self.encoding == "zstd":
+            return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return data
+
+    def finish(self) -> bytes:
+        if self.encoding == "gzip":
+            return self._obj.flush()
+        if self.encoding == "br":
+            return self._obj.finish()
+        if self.encoding == "zstd":
+            return self._obj.flush()
+        return b""
+
+
+class StubState:
+    """In-memory chats and messages shared by all request threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chats = {}
+        self.messages = {}
+        self.next_chat_id = 1
+        self.next_message_id = 1
+
+    def create_chat(self, body: dict) -> dict:
+        with self.lock:
+            chat_id = self.next_chat_id
+            self.next_chat_id += 1
+            now = _now()
+            external_user_id = body.get("external_user_id")
+            chat = {
+                "id": chat_id,
+                "name": body.get("name") or "Untitled",
+                "created_at": now,
+                "updated_at": now,
+                "meta": {
+                    "conversation_agent_id": body.get("agent_id") or STUB_AGENT["id"],
+                    "external_user_id": external_user_id,
+                },
+                "external_user_id": external_user_id,
+            }
+            self.chats[chat_id] = chat
+            self.messages[chat_id] = []
+            return chat
+
+    def add_message(self, chat_id: int, role: str, content: str, group_id: str):
+        with self.lock:
+            message = {
+                "id": self.next_message_id,
+                "group_id": group_id,
+                "role": role,
+                "content": content,
+                "meta": {
+                    "agent_profile": None,
+                    "participant_email": None,
+                    "reasoning_steps": None,
+                    "token_usage": None,
+                    "related_questions": None,
+                    "current_step_index": None,
+                    "response_time_ms": None,
+                },
+                "attached_files": [],
+            }
+            self.next_message_id += 1
+            self.messages[chat_id].append(message)
+            self.chats[chat_id]["updated_at"] = _now()
+            return message
+
+    def seed_history(self, chats: int, messages_per_chat: int):
+        """Create chats with long, detailed histories (reasoning steps, attachments)"""
+        for chat_index in range(chats):
+            chat = self.create_chat({"name": f"Seeded chat {chat_index + 1}"})
+            for turn in range(0, messages_per_chat, 2):
+                group_id = f"cvg-{uuid.uuid4()}"
+                self.add_message(chat["id"], "user", f"Question {turn // 2 + 1}: how do I reset my password?", group_id)
+                if turn + 1 >= messages_per_chat:
+                    break
+                answer = self.add_message(chat["id"], "assistant", " ".join(STUB_ANSWER_WORDS * 8), group_id)
+                answer["meta"]["reasoning_steps"] = [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "type": "search_web",
+                        "content": f"Searching knowledge base for step {step}",
+                        "args": {"query": "reset password"},
+                        "result": {"snippets": [" ".join(STUB_ANSWER_WORDS)] * 3},
+                        "timestamp": _now(),
+                    }
+                    for step in range(3)
+                ]
+                answer["meta"]["token_usage"] = {"total_tokens": 609, "total_prompt_tokens": 133, "total_completion_tokens": 476}
+                answer["attached_files"] = [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "type": "application/pdf",
+                        "name": "document.pdf",
+                        "url": "https://example.com/media/document.pdf",
+                        "scope": "persistent",
+                        "attachment_type": "file",
+                    }
+                ]
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that drop keep-alive connections are normal under load
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ---- helpers ----
+
+    def negotiate_encoding(self) -> str:
+        """Best Content-Encoding accepted by the client, or "" for none"""
+        if not self.server.compression:
+            return ""
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in (self.headers.get("Accept-Encoding") or "").split(",")
+        }
+        for encoding, available in (("zstd", zstandard is not None), ("br", brotli is not None), ("gzip", True)):
+            if available and encoding in accepted:
+                return encoding
+        return ""
+
+    def send_json(self, data, status: int = 200, pagination=None):
+        body = json.dumps(
+            {"error_code": 0 if status == 200 else 1, "message": None, "pagination": pagination, "data": data},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        encoding = self.negotiate_encoding()
+        if encoding:
+            compressor = StreamCompressor(encoding)
+            body = compressor.compress(body) + compressor.finish()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: int, message: str):
+        body = json.dumps({"error_code": status, "message": message, "data": None}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            data = json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def paginate(self, items: list):
+        query = parse_qs(urlparse(self.path).query)
+        limit = min(int(query.get("limit", ["50"])[0]), 1000)
+        offset = int(query.get("offset", ["0"])[0])
+        page = items[offset:offset + limit]
+        pagination = {
+            "limit": limit,
+            "offset": offset,
+            "total_records": len(items),
+            "current_page": offset // limit + 1 if limit else 1,
+            "total_pages": (len(items) + limit - 1) // limit if limit else 1,
+        }
+        return page, pagination
+
+    # ---- routes ----
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        state = self.server.state
+
+        if path == "/api/v1/chats/published-agents":
+            self.send_json([STUB_AGENT])
+            return
+
+        if path == "/api/v1/chats":
+            with state.lock:
+                chats = sorted(state.chats.values(), key=lambda chat: chat["id"], reverse=True)
+            page, pagination = self.paginate(chats)
+            self.send_json(page, pagination=pagination)
+            return
+
+        match = MESSAGES_PATH.match(path)
+        if match:
+            chat_id = int(match.group(1))
+            with state.lock:
+                messages = list(state.messages.get(chat_id) or [])
+                known = chat_id in state.chats
+            if not known:
+                self.send_error_json(404, "Chat not found")
+                return
+            page, pagination = self.paginate(messages)
+            self.send_json(page, pagination=pagination)
+            return
+
+        self.send_error_json(404, "Not found")
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        state = self.server.state
+        body = self.read_json()
+
+        if path == "/api/v1/chats":
+            self.send_json(state.create_chat(body))
+            return
+
+        match = MESSAGES_PATH.match(path)
+        if not match:
+            self.send_error_json(404, "Not found")
+            return
+
+        chat_id = int(match.group(1))
+        with state.lock:
+            known = chat_id in state.chats
+        if not known:
+            self.send_error_json(404, "Chat not found")
+            return
+
+        group_id = f"cvg-{uuid.uuid4()}"
+        state.add_message(chat_id, "user", str(body.get("message") or ""), group_id)
+        words = STUB_ANSWER_WORDS[: self.server.tokens]
+        final_text = " ".join(words)
+
+        if not body.get("stream", True):
+            time.sleep(self.server.first_token_delay + self.server.token_delay * len(words))
+            state.add_message(chat_id, "assistant", final_text, group_id)
+            self.send_json(final_text)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        compressor = StreamCompressor(self.negotiate_encoding())
+        if compressor.encoding:
+            self.send_header("Content-Encoding", compressor.encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+
+        base = {
+            "response_id": str(uuid.uuid4()),
+            "chat_id": chat_id,
+        }
+
+        def write_chunk(chunk: bytes):
+            # One HTTP chunk per SSE frame so clients see each event as soon as it is sent
+            if chunk:
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                self.wfile.flush()
+
+        def emit(event: str, data: dict):
+            payload = json.dumps({"type": event, **base, **data}, ensure_ascii=False)
+            write_chunk(compressor.compress(f"event: {event}\ndata: {payload}\n\n".encode("utf-8")))
+
+        emit("response.created", {"agent_id": body.get("agent_id") or STUB_AGENT["id"], "model": "stub"})
+        time.sleep(self.server.first_token_delay)
+        for index, word in enumerate(words):
+            emit("response.output_text.delta", {"delta": word if index == 0 else " " + word})
+            time.sleep(self.server.token_delay)
+        emit(
+            "response.output_text.completed",
+            {
+                "final_text": final_text,
+                "usage": {
+                    "total_tokens": len(words),
+                    "total_prompt_tokens": 0,
+                    "total_completion_tokens": len(words),
+                    "total_calls": 1,
+                },
+            },
+        )
+        write_chunk(compressor.compress(b"data: [DONE]\n\n") + compressor.finish())
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+        state.add_message(chat_id, "assistant", final_text, group_id)
+
+
+def start_stub_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    tokens: int = len(STUB_ANSWER_WORDS),
+    token_delay: float = 0.01,
+    first_token_delay: float = 0.05,
+    verbose: bool = False,
+    compression: bool = True,
+    seed_chats: int = 0,
+    seed_messages: int = 0,
+) -> StubServer:
+    """
+    Start the stub server on a daemon thread and return it.
+    Use port=0 to pick a free port; the API root is then
+    f"http://{host}:{server.server_address[1]}".
+    """
+    server = StubServer((host, port), StubHandler)
+    server.state = StubState()
+    server.tokens = tokens
+    server.token_delay = token_delay
+    server.first_token_delay = first_token_delay
+    server.verbose = verbose
+    server.compression = compression
+    server.state.seed_history(seed_chats, seed_messages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """Run the stub server in the foreground"""
+    parser = argparse.ArgumentParser(description="Local stub of the Codeer Chat API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--tokens", type=int, default=len(STUB_ANSWER_WORDS), help="words per answer")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between deltas")
+    parser.add_argument("--first-token-delay", type=float, default=0.05, help="seconds before the first delta")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--no-compression", action="store_true", help="ignore Accept-Encoding")
+    parser.add_argument("--seed-chats", type=int, default=0, help="chats to pre-fill with history")
+    parser.add_argument("--seed-messages", type=int, default=0, help="messages per seeded chat")
+    args = parser.parse_args()
+
+    server = start_stub_server(
+        args.host,
+        args.port,
+        args.tokens,
+        args.token_delay,
+        args.first_token_delay,
+        args.verbose,
+        compression=not args.no_compression,
+        seed_chats=args.seed_chats,
+        seed_messages=args.seed_messages,
+    )
+    print(f"Codeer stub server listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()